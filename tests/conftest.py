@@ -5,16 +5,176 @@ This module provides common test fixtures and configuration that can be
 shared across all test modules.
 """
 
+import json
 import pytest
 import os
+import re
+import sys
+from unittest.mock import MagicMock, Mock, NonCallableMock
 
+# Make weather_cli importable for every test module. conftest is loaded before
+# any test module, so the path (and the cached weather_cli module in
+# sys.modules) is set up exactly once for the whole suite.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-@pytest.fixture(autouse=True)
-def clean_environment(monkeypatch):
+import weather_cli  # noqa: E402  (needs the sys.path tweak above)
+
+# requests is already loaded as a dependency of weather_cli; reuse that module
+# object instead of spelling out a second package import.
+from weather_cli import requests  # noqa: E402
+
+
+# Canned API responses, built once at import time. Fixtures below hand out
+# references to these constants, so treat them as read-only.
+_REAL_WEATHER_RESPONSE = {
+    "coord": {"lon": -0.1257, "lat": 51.5085},
+    "weather": [
+        {
+            "id": 800,
+            "main": "Clear",
+            "description": "clear sky",
+            "icon": "01d"
+        }
+    ],
+    "base": "stations",
+    "main": {
+        "temp": 18.5,
+        "feels_like": 17.8,
+        "temp_min": 16.2,
+        "temp_max": 20.1,
+        "pressure": 1013,
+        "humidity": 72
+    },
+    "visibility": 10000,
+    "wind": {
+        "speed": 3.6,
+        "deg": 230,
+        "gust": 5.1
+    },
+    "clouds": {
+        "all": 20
+    },
+    "dt": 1634567890,
+    "sys": {
+        "type": 2,
+        "id": 2019646,
+        "country": "GB",
+        "sunrise": 1634537890,
+        "sunset": 1634577890
+    },
+    "timezone": 0,
+    "id": 2643743,
+    "name": "London",
+    "cod": 200
+}
+
+_RAINY_WEATHER_RESPONSE = {
+    "coord": {"lon": 2.3522, "lat": 48.8566},
+    "weather": [
+        {
+            "id": 500,
+            "main": "Rain",
+            "description": "light rain",
+            "icon": "10d"
+        }
+    ],
+    "main": {
+        "temp": 15.2,
+        "feels_like": 14.5,
+        "temp_min": 13.8,
+        "temp_max": 16.4,
+        "pressure": 1008,
+        "humidity": 85
+    },
+    "wind": {
+        "speed": 4.2,
+        "deg": 270
+    },
+    "rain": {
+        "1h": 2.5
+    },
+    "clouds": {
+        "all": 90
+    },
+    "sys": {
+        "country": "FR"
+    },
+    "name": "Paris",
+    "cod": 200
+}
+
+_SNOWY_WEATHER_RESPONSE = {
+    "coord": {"lon": 37.6156, "lat": 55.7522},
+    "weather": [
+        {
+            "id": 600,
+            "main": "Snow",
+            "description": "light snow",
+            "icon": "13d"
+        }
+    ],
+    "main": {
+        "temp": -5.3,
+        "feels_like": -10.2,
+        "temp_min": -7.1,
+        "temp_max": -3.5,
+        "pressure": 1020,
+        "humidity": 92
+    },
+    "wind": {
+        "speed": 6.8,
+        "deg": 45
+    },
+    "snow": {
+        "1h": 1.2
+    },
+    "clouds": {
+        "all": 100
+    },
+    "sys": {
+        "country": "RU"
+    },
+    "name": "Moscow",
+    "cod": 200
+}
+
+
+# Pre-serialized once at import time; see real_weather_response_mut below.
+_REAL_WEATHER_RESPONSE_JSON = json.dumps(_REAL_WEATHER_RESPONSE)
+
+
+class FakeResponse:
+    """
+    Minimal stand-in for an HTTP response.
+
+    For tests that only need status_code/json()/raise_for_status() behaviour,
+    instantiating this plain class is far cheaper than building a Mock. Tests
+    that assert on call tracking should keep using make_mock_response.
+    """
+
+    def __init__(self, payload=None, status_code=200, raise_exc=None, headers=None):
+        self._payload = payload
+        self.status_code = status_code
+        self._raise_exc = raise_exc
+        self.headers = headers or {}
+        self.content = json.dumps(payload).encode("utf-8")
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self._raise_exc is not None:
+            raise self._raise_exc
+
+
+@pytest.fixture
+def clean_env(monkeypatch):
     """
-    Automatically clean environment variables before each test.
+    Clean API-key environment variables for tests that read the environment.
 
-    This ensures tests don't accidentally use real API keys from the environment.
+    Opt-in rather than autouse: most tests pass an explicit API key or mock
+    WeatherCLI entirely, so only the handful of tests that actually consult
+    the environment need to pay the monkeypatch setup/teardown.
     """
     # Remove API key from environment if it exists
     monkeypatch.delenv("OPENWEATHER_API_KEY", raising=False)
@@ -26,146 +186,124 @@ def mock_api_key():
     return "mock_test_api_key_abc123"
 
 
+@pytest.fixture(scope="session")
+def assert_contains_all():
+    """
+    Provide a checker that verifies all tokens appear in an output string.
+
+    Instead of one substring scan per token, the tokens are compiled into a
+    single alternation pattern (cached per token set for the session) and the
+    output is scanned once. Longer tokens are tried first so overlapping
+    tokens cannot shadow each other.
+    """
+    cache = {}
+
+    def check(output, tokens):
+        key = frozenset(tokens)
+        pattern = cache.get(key)
+        if pattern is None:
+            ordered = sorted(key, key=len, reverse=True)
+            pattern = cache.setdefault(
+                key, re.compile("|".join(re.escape(t) for t in ordered)))
+        missing = key - set(pattern.findall(output))
+        assert not missing, f"tokens not found in output: {sorted(missing)}"
+
+    return check
+
+
+@pytest.fixture
+def nocapture(capsys):
+    """
+    Disable output capture for the duration of a test.
+
+    For tests that never read capsys, this skips the per-test buffering of
+    stdout/stderr that pytest performs by default.
+    """
+    with capsys.disabled():
+        yield
+
+
+@pytest.fixture(scope="session")
+def _patched_requests_get():
+    """Install a single MagicMock over ``requests.Session.get``.
+
+    WeatherCLI issues its requests through a persistent Session, so the mock
+    goes on the Session class. The patch is applied once for the whole
+    session; tests get at it through the function-scoped mock_get wrapper
+    below. (A MagicMock is not a descriptor, so instance lookups return it
+    unbound and the recorded call args match the url/params/timeout the code
+    passes.)
+    """
+    mp = pytest.MonkeyPatch()
+    mock = MagicMock()
+    mp.setattr("weather_cli.requests.Session.get", mock)
+    yield mock
+    mp.undo()
+
+
+@pytest.fixture
+def mock_get(_patched_requests_get):
+    """
+    Provide the session-wide HTTP GET mock, reset per test.
+
+    Resetting call history, return_value and side_effect is far cheaper than
+    re-patching the attribute for every test.
+    """
+    _patched_requests_get.reset_mock(return_value=True, side_effect=True)
+    return _patched_requests_get
+
+
 @pytest.fixture
+def make_mock_response():
+    """
+    Provide a factory for pre-configured mock HTTP responses.
+
+    Using ``spec=requests.Response`` pins the mock's attribute set up front
+    instead of growing it lazily on each attribute access, and a response is
+    never itself called, so NonCallableMock skips the call machinery too.
+    """
+    def _make(payload=None, status_code=200, headers=None):
+        response = NonCallableMock(spec=requests.Response)
+        response.json.return_value = payload
+        response.content = json.dumps(payload).encode("utf-8")
+        response.status_code = status_code
+        # A real dict, so header lookups return None rather than a new Mock.
+        response.headers = headers or {}
+        response.raise_for_status = Mock()
+        return response
+    return _make
+
+
+@pytest.fixture(scope="session")
 def real_weather_response():
     """
     Provide a realistic weather API response for testing.
 
     This fixture represents a typical successful response from OpenWeatherMap API.
+    The response is shared across the whole session, so tests must not mutate it.
     """
-    return {
-        "coord": {"lon": -0.1257, "lat": 51.5085},
-        "weather": [
-            {
-                "id": 800,
-                "main": "Clear",
-                "description": "clear sky",
-                "icon": "01d"
-            }
-        ],
-        "base": "stations",
-        "main": {
-            "temp": 18.5,
-            "feels_like": 17.8,
-            "temp_min": 16.2,
-            "temp_max": 20.1,
-            "pressure": 1013,
-            "humidity": 72
-        },
-        "visibility": 10000,
-        "wind": {
-            "speed": 3.6,
-            "deg": 230,
-            "gust": 5.1
-        },
-        "clouds": {
-            "all": 20
-        },
-        "dt": 1634567890,
-        "sys": {
-            "type": 2,
-            "id": 2019646,
-            "country": "GB",
-            "sunrise": 1634537890,
-            "sunset": 1634577890
-        },
-        "timezone": 0,
-        "id": 2643743,
-        "name": "London",
-        "cod": 200
-    }
+    return _REAL_WEATHER_RESPONSE
 
 
 @pytest.fixture
+def real_weather_response_mut():
+    """
+    Provide a fresh, mutable copy of the realistic weather response.
+
+    For tests that need to modify the payload: deserializing the
+    pre-serialized JSON string is done in C and is cheaper than running
+    copy.deepcopy over the nested dicts.
+    """
+    return json.loads(_REAL_WEATHER_RESPONSE_JSON)
+
+
+@pytest.fixture(scope="session")
 def rainy_weather_response():
     """Provide weather response for rainy conditions."""
-    return {
-        "coord": {"lon": 2.3522, "lat": 48.8566},
-        "weather": [
-            {
-                "id": 500,
-                "main": "Rain",
-                "description": "light rain",
-                "icon": "10d"
-            }
-        ],
-        "main": {
-            "temp": 15.2,
-            "feels_like": 14.5,
-            "temp_min": 13.8,
-            "temp_max": 16.4,
-            "pressure": 1008,
-            "humidity": 85
-        },
-        "wind": {
-            "speed": 4.2,
-            "deg": 270
-        },
-        "rain": {
-            "1h": 2.5
-        },
-        "clouds": {
-            "all": 90
-        },
-        "sys": {
-            "country": "FR"
-        },
-        "name": "Paris",
-        "cod": 200
-    }
+    return _RAINY_WEATHER_RESPONSE
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def snowy_weather_response():
     """Provide weather response for snowy conditions."""
-    return {
-        "coord": {"lon": 37.6156, "lat": 55.7522},
-        "weather": [
-            {
-                "id": 600,
-                "main": "Snow",
-                "description": "light snow",
-                "icon": "13d"
-            }
-        ],
-        "main": {
-            "temp": -5.3,
-            "feels_like": -10.2,
-            "temp_min": -7.1,
-            "temp_max": -3.5,
-            "pressure": 1020,
-            "humidity": 92
-        },
-        "wind": {
-            "speed": 6.8,
-            "deg": 45
-        },
-        "snow": {
-            "1h": 1.2
-        },
-        "clouds": {
-            "all": 100
-        },
-        "sys": {
-            "country": "RU"
-        },
-        "name": "Moscow",
-        "cod": 200
-    }
-
-
-def pytest_configure(config):
-    """
-    Pytest configuration hook.
-
-    Add custom markers and configuration.
-    """
-    config.addinivalue_line(
-        "markers", "integration: mark test as integration test"
-    )
-    config.addinivalue_line(
-        "markers", "unit: mark test as unit test"
-    )
-    config.addinivalue_line(
-        "markers", "slow: mark test as slow running"
-    )
+    return _SNOWY_WEATHER_RESPONSE
@@ -9,16 +9,103 @@ This test suite includes:
 - Edge case handling
 """
 
+import asyncio
+import gzip
 import os
-import sys
+import socket
+import sqlite3
+import threading
+import time
+
 import pytest
 from unittest.mock import patch, Mock, MagicMock
-import requests
 
-# Add parent directory to path to import the module
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# conftest.py has already put the project root on sys.path and imported the
+# module, so these resolve straight from sys.modules. requests (and the
+# optional aiohttp) are reused from weather_cli's own imports rather than
+# spelled as fresh package imports.
+from weather_cli import (AsyncWeatherCLI, WeatherCLI, WeatherAPIError, aiohttp,
+                         main, query_daemon, requests, run_daemon)
+
+needs_aiohttp = pytest.mark.skipif(aiohttp is None, reason="aiohttp not installed")
+
+from tests.conftest import FakeResponse
 
-from weather_cli import WeatherCLI, WeatherAPIError, main
+
+# Canned API responses, built once at import time and shared read-only by the
+# fixtures below.
+_SAMPLE_WEATHER_RESPONSE = {
+    "coord": {"lon": -0.1257, "lat": 51.5085},
+    "weather": [
+        {
+            "id": 800,
+            "main": "Clear",
+            "description": "clear sky",
+            "icon": "01d"
+        }
+    ],
+    "base": "stations",
+    "main": {
+        "temp": 18.5,
+        "feels_like": 17.8,
+        "temp_min": 16.2,
+        "temp_max": 20.1,
+        "pressure": 1013,
+        "humidity": 72
+    },
+    "visibility": 10000,
+    "wind": {
+        "speed": 3.6,
+        "deg": 230
+    },
+    "clouds": {
+        "all": 20
+    },
+    "dt": 1634567890,
+    "sys": {
+        "type": 2,
+        "id": 2019646,
+        "country": "GB",
+        "sunrise": 1634537890,
+        "sunset": 1634577890
+    },
+    "timezone": 0,
+    "id": 2643743,
+    "name": "London",
+    "cod": 200
+}
+
+_SAMPLE_WEATHER_RESPONSE_IMPERIAL = {
+    "coord": {"lon": -74.006, "lat": 40.7143},
+    "weather": [
+        {
+            "id": 801,
+            "main": "Clouds",
+            "description": "few clouds",
+            "icon": "02d"
+        }
+    ],
+    "main": {
+        "temp": 65.3,
+        "feels_like": 64.2,
+        "temp_min": 62.5,
+        "temp_max": 68.0,
+        "pressure": 1015,
+        "humidity": 68
+    },
+    "wind": {
+        "speed": 8.5,
+        "deg": 180
+    },
+    "clouds": {
+        "all": 15
+    },
+    "sys": {
+        "country": "US"
+    },
+    "name": "New York",
+    "cod": 200
+}
 
 
 # Test Fixtures
@@ -28,547 +115,957 @@ def api_key():
     return "test_api_key_12345"
 
 
-@pytest.fixture
-def weather_cli(api_key):
-    """Create a WeatherCLI instance with a test API key."""
-    return WeatherCLI(api_key=api_key)
+@pytest.fixture(scope="session")
+def weather_cli():
+    """
+    Create a shared WeatherCLI instance with a test API key.
 
+    Session-scoped: tests only call its read-only methods, so one instance
+    serves the whole suite. The key is inlined rather than taken from the
+    function-scoped api_key fixture, which would force function scope here.
+    Caching and retries are disabled so every test observes exactly one HTTP
+    call per query, with no backoff sleeps.
+    """
+    return WeatherCLI(api_key="test_api_key_12345", cache_ttl=0, max_retries=0)
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
 def sample_weather_response():
-    """Sample successful weather API response."""
-    return {
-        "coord": {"lon": -0.1257, "lat": 51.5085},
-        "weather": [
-            {
-                "id": 800,
-                "main": "Clear",
-                "description": "clear sky",
-                "icon": "01d"
-            }
-        ],
-        "base": "stations",
-        "main": {
-            "temp": 18.5,
-            "feels_like": 17.8,
-            "temp_min": 16.2,
-            "temp_max": 20.1,
-            "pressure": 1013,
-            "humidity": 72
-        },
-        "visibility": 10000,
-        "wind": {
-            "speed": 3.6,
-            "deg": 230
-        },
-        "clouds": {
-            "all": 20
-        },
-        "dt": 1634567890,
-        "sys": {
-            "type": 2,
-            "id": 2019646,
-            "country": "GB",
-            "sunrise": 1634537890,
-            "sunset": 1634577890
-        },
-        "timezone": 0,
-        "id": 2643743,
-        "name": "London",
-        "cod": 200
-    }
+    """Sample successful weather API response (shared, read-only)."""
+    return _SAMPLE_WEATHER_RESPONSE
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_weather_response_imperial():
-    """Sample weather API response with imperial units."""
-    return {
-        "coord": {"lon": -74.006, "lat": 40.7143},
-        "weather": [
-            {
-                "id": 801,
-                "main": "Clouds",
-                "description": "few clouds",
-                "icon": "02d"
-            }
-        ],
-        "main": {
-            "temp": 65.3,
-            "feels_like": 64.2,
-            "temp_min": 62.5,
-            "temp_max": 68.0,
-            "pressure": 1015,
-            "humidity": 68
-        },
-        "wind": {
-            "speed": 8.5,
-            "deg": 180
-        },
-        "clouds": {
-            "all": 15
-        },
-        "sys": {
-            "country": "US"
-        },
-        "name": "New York",
-        "cod": 200
-    }
+    """Sample weather API response with imperial units (shared, read-only)."""
+    return _SAMPLE_WEATHER_RESPONSE_IMPERIAL
 
 
 # Initialization Tests
-class TestWeatherCLIInitialization:
-    """Test WeatherCLI initialization and configuration."""
-
-    def test_init_with_api_key(self, api_key):
-        """Test initialization with explicit API key."""
-        cli = WeatherCLI(api_key=api_key)
-        assert cli.api_key == api_key
-
-    def test_init_with_env_variable(self, api_key, monkeypatch):
-        """Test initialization with API key from environment variable."""
-        monkeypatch.setenv("OPENWEATHER_API_KEY", api_key)
-        cli = WeatherCLI()
-        assert cli.api_key == api_key
-
-    def test_init_without_api_key(self, monkeypatch):
-        """Test initialization fails without API key."""
-        monkeypatch.delenv("OPENWEATHER_API_KEY", raising=False)
-        with pytest.raises(WeatherAPIError) as exc_info:
-            WeatherCLI()
-        assert "No API key provided" in str(exc_info.value)
 
-    def test_init_env_variable_precedence(self, monkeypatch):
-        """Test that explicit API key takes precedence over environment variable."""
-        monkeypatch.setenv("OPENWEATHER_API_KEY", "env_key")
-        cli = WeatherCLI(api_key="explicit_key")
-        assert cli.api_key == "explicit_key"
+@pytest.mark.xdist_group(name="initialization")
+def test_init_with_api_key(api_key):
+    """Test initialization with explicit API key."""
+    cli = WeatherCLI(api_key=api_key)
+    assert cli.api_key == api_key
+
+
+@pytest.mark.xdist_group(name="initialization")
+def test_init_with_env_variable(api_key, monkeypatch, clean_env):
+    """Test initialization with API key from environment variable."""
+    monkeypatch.setenv("OPENWEATHER_API_KEY", api_key)
+    cli = WeatherCLI()
+    assert cli.api_key == api_key
+
+
+@pytest.mark.xdist_group(name="initialization")
+def test_init_without_api_key(clean_env):
+    """Test initialization fails without API key."""
+    with pytest.raises(WeatherAPIError) as exc_info:
+        WeatherCLI()
+    assert "No API key provided" in str(exc_info.value)
+
+
+@pytest.mark.xdist_group(name="initialization")
+def test_init_env_variable_precedence(monkeypatch):
+    """Test that explicit API key takes precedence over environment variable."""
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "env_key")
+    cli = WeatherCLI(api_key="explicit_key")
+    assert cli.api_key == "explicit_key"
+
+
+@pytest.mark.xdist_group(name="initialization")
+def test_async_cli_requires_aiohttp(api_key, monkeypatch):
+    """Test that AsyncWeatherCLI fails with a clear error when aiohttp is missing."""
+    monkeypatch.setattr("weather_cli.aiohttp", None)
+
+    with pytest.raises(WeatherAPIError) as exc_info:
+        AsyncWeatherCLI(api_key=api_key)
+
+    assert "aiohttp" in str(exc_info.value)
+
+
+@pytest.mark.xdist_group(name="initialization")
+def test_context_manager_closes_session(api_key):
+    """Test that using WeatherCLI as a context manager closes its session."""
+    cli = WeatherCLI(api_key=api_key)
+    cli._session = MagicMock()
+
+    with cli:
+        pass
+
+    cli._session.close.assert_called_once()
 
 
 # API Request Tests
-class TestWeatherAPIRequests:
-    """Test weather API request functionality."""
 
-    @patch('weather_cli.requests.get')
-    def test_get_weather_success(self, mock_get, weather_cli, sample_weather_response):
-        """Test successful weather data retrieval."""
-        mock_response = Mock()
-        mock_response.json.return_value = sample_weather_response
-        mock_response.raise_for_status = Mock()
-        mock_get.return_value = mock_response
+@pytest.mark.xdist_group(name="api_requests")
+def test_get_weather_success(mock_get, weather_cli, sample_weather_response, make_mock_response):
+    """Test successful weather data retrieval."""
+    mock_get.return_value = make_mock_response(sample_weather_response)
 
-        result = weather_cli.get_weather("London")
+    result = weather_cli.get_weather("London")
 
-        assert result == sample_weather_response
-        mock_get.assert_called_once()
-        call_args = mock_get.call_args
-        assert call_args[0][0] == WeatherCLI.BASE_URL
-        assert call_args[1]['params']['q'] == "London"
-        assert call_args[1]['params']['appid'] == weather_cli.api_key
-        assert call_args[1]['params']['units'] == "metric"
-
-    @patch('weather_cli.requests.get')
-    def test_get_weather_with_imperial_units(self, mock_get, weather_cli, sample_weather_response_imperial):
-        """Test weather retrieval with imperial units."""
-        mock_response = Mock()
-        mock_response.json.return_value = sample_weather_response_imperial
-        mock_response.raise_for_status = Mock()
-        mock_get.return_value = mock_response
-
-        result = weather_cli.get_weather("New York", units="imperial")
-
-        assert result == sample_weather_response_imperial
-        call_args = mock_get.call_args
-        assert call_args[1]['params']['units'] == "imperial"
-
-    @patch('weather_cli.requests.get')
-    def test_get_weather_with_standard_units(self, mock_get, weather_cli, sample_weather_response):
-        """Test weather retrieval with standard (Kelvin) units."""
-        mock_response = Mock()
-        mock_response.json.return_value = sample_weather_response
-        mock_response.raise_for_status = Mock()
-        mock_get.return_value = mock_response
-
-        weather_cli.get_weather("Tokyo", units="standard")
-
-        call_args = mock_get.call_args
-        assert call_args[1]['params']['units'] == "standard"
-
-    @patch('weather_cli.requests.get')
-    def test_get_weather_strips_whitespace(self, mock_get, weather_cli, sample_weather_response):
-        """Test that city names with whitespace are properly stripped."""
-        mock_response = Mock()
-        mock_response.json.return_value = sample_weather_response
-        mock_response.raise_for_status = Mock()
-        mock_get.return_value = mock_response
-
-        weather_cli.get_weather("  London  ")
-
-        call_args = mock_get.call_args
-        assert call_args[1]['params']['q'] == "London"
-
-    @patch('weather_cli.requests.get')
-    def test_get_weather_timeout_parameter(self, mock_get, weather_cli, sample_weather_response):
-        """Test that API requests include timeout parameter."""
-        mock_response = Mock()
-        mock_response.json.return_value = sample_weather_response
-        mock_response.raise_for_status = Mock()
-        mock_get.return_value = mock_response
-
-        weather_cli.get_weather("Paris")
-
-        call_args = mock_get.call_args
-        assert call_args[1]['timeout'] == 10
+    assert result == sample_weather_response
+    mock_get.assert_called_once()
+    call_args = mock_get.call_args
+    assert call_args[0][0] == WeatherCLI.BASE_URL
+    assert call_args[1]['params']['q'] == "London"
+    assert call_args[1]['params']['appid'] == weather_cli.api_key
+    assert call_args[1]['params']['units'] == "metric"
+
+
+@pytest.mark.xdist_group(name="api_requests")
+def test_get_weather_with_imperial_units(mock_get, weather_cli, sample_weather_response_imperial, make_mock_response):
+    """Test weather retrieval with imperial units."""
+    mock_get.return_value = make_mock_response(sample_weather_response_imperial)
+
+    result = weather_cli.get_weather("New York", units="imperial")
+
+    assert result == sample_weather_response_imperial
+    call_args = mock_get.call_args
+    assert call_args[1]['params']['units'] == "imperial"
+
+
+@pytest.mark.xdist_group(name="api_requests")
+def test_get_weather_with_standard_units(mock_get, weather_cli, sample_weather_response, make_mock_response):
+    """Test weather retrieval with standard (Kelvin) units."""
+    mock_get.return_value = make_mock_response(sample_weather_response)
+
+    weather_cli.get_weather("Tokyo", units="standard")
+
+    call_args = mock_get.call_args
+    assert call_args[1]['params']['units'] == "standard"
+
+
+@pytest.mark.xdist_group(name="api_requests")
+def test_get_weather_strips_whitespace(mock_get, weather_cli, sample_weather_response, make_mock_response):
+    """Test that city names with whitespace are properly stripped."""
+    mock_get.return_value = make_mock_response(sample_weather_response)
+
+    weather_cli.get_weather("  London  ")
+
+    call_args = mock_get.call_args
+    assert call_args[1]['params']['q'] == "London"
+
+
+@pytest.mark.xdist_group(name="api_requests")
+def test_get_weather_timeout_parameter(mock_get, weather_cli, sample_weather_response, make_mock_response):
+    """Test that API requests include timeout parameter."""
+    mock_get.return_value = make_mock_response(sample_weather_response)
+
+    weather_cli.get_weather("Paris")
+
+    call_args = mock_get.call_args
+    assert call_args[1]['timeout'] == 10
 
 
 # Input Validation Tests
-class TestInputValidation:
-    """Test input validation and error handling."""
 
-    def test_empty_city_name(self, weather_cli):
-        """Test that empty city name raises error."""
-        with pytest.raises(WeatherAPIError) as exc_info:
-            weather_cli.get_weather("")
-        assert "City name cannot be empty" in str(exc_info.value)
+@pytest.mark.xdist_group(name="input_validation")
+def test_empty_city_name(weather_cli):
+    """Test that empty city name raises error."""
+    with pytest.raises(WeatherAPIError) as exc_info:
+        weather_cli.get_weather("")
+    assert "City name cannot be empty" in str(exc_info.value)
 
-    def test_whitespace_only_city_name(self, weather_cli):
-        """Test that whitespace-only city name raises error."""
-        with pytest.raises(WeatherAPIError) as exc_info:
-            weather_cli.get_weather("   ")
-        assert "City name cannot be empty" in str(exc_info.value)
+
+@pytest.mark.xdist_group(name="input_validation")
+def test_whitespace_only_city_name(weather_cli):
+    """Test that whitespace-only city name raises error."""
+    with pytest.raises(WeatherAPIError) as exc_info:
+        weather_cli.get_weather("   ")
+    assert "City name cannot be empty" in str(exc_info.value)
 
 
 # Error Handling Tests
-class TestErrorHandling:
-    """Test error handling for various API failure scenarios."""
 
-    @patch('weather_cli.requests.get')
-    def test_timeout_error(self, mock_get, weather_cli):
-        """Test handling of request timeout."""
-        mock_get.side_effect = requests.exceptions.Timeout()
+ERROR_CASES = [
+    pytest.param(requests.exceptions.Timeout(), None,
+                 "Request timed out", id="timeout"),
+    pytest.param(requests.exceptions.ConnectionError(), None,
+                 "Connection error", id="connection-error"),
+    pytest.param(requests.exceptions.RequestException("Generic error"), None,
+                 "An error occurred while fetching weather data", id="generic"),
+    pytest.param(None, 401, "Invalid API key", id="401-unauthorized"),
+    pytest.param(None, 404, "City 'London' not found", id="404-not-found"),
+    pytest.param(None, 500, "HTTP error occurred", id="500-server-error"),
+]
+
+
+@pytest.mark.xdist_group(name="error_handling")
+@pytest.mark.parametrize("side_effect,status_code,expected_message", ERROR_CASES)
+def test_api_error(mock_get, weather_cli,
+                   side_effect, status_code, expected_message):
+    """Test that API failures surface as WeatherAPIError with a clear message."""
+    if side_effect is not None:
+        mock_get.side_effect = side_effect
+    else:
+        mock_get.return_value = FakeResponse(
+            status_code=status_code,
+            raise_exc=requests.exceptions.HTTPError())
+
+    with pytest.raises(WeatherAPIError) as exc_info:
+        weather_cli.get_weather("London")
+    assert expected_message in str(exc_info.value)
+
+
+@pytest.mark.xdist_group(name="error_handling")
+def test_malformed_response_body(mock_get, weather_cli):
+    """Test that a 200 response with a broken JSON body raises WeatherAPIError."""
+    response = FakeResponse(payload={})
+    response.content = b'{"broken'
+    mock_get.return_value = response
+
+    with pytest.raises(WeatherAPIError, match="error occurred"):
+        weather_cli.get_weather("London")
 
-        with pytest.raises(WeatherAPIError) as exc_info:
-            weather_cli.get_weather("London")
-        assert "Request timed out" in str(exc_info.value)
 
-    @patch('weather_cli.requests.get')
-    def test_connection_error(self, mock_get, weather_cli):
-        """Test handling of connection errors."""
-        mock_get.side_effect = requests.exceptions.ConnectionError()
+# Output Formatting Tests
 
-        with pytest.raises(WeatherAPIError) as exc_info:
-            weather_cli.get_weather("London")
-        assert "Connection error" in str(exc_info.value)
+UNIT_CASES = [
+    pytest.param("sample_weather_response", "metric",
+                 ("London", "GB", "Clear", "clear sky", "18.5\u00b0C", "17.8\u00b0C",
+                  "72%", "1013 hPa", "3.6 m/s", "230\u00b0", "20%"),
+                 id="metric"),
+    pytest.param("sample_weather_response_imperial", "imperial",
+                 ("New York", "US", "65.3\u00b0F", "64.2\u00b0F", "8.5 mph"),
+                 id="imperial"),
+    # Standard units use Kelvin (no degree symbol added, just K)
+    pytest.param("sample_weather_response", "standard",
+                 ("18.5K", "17.8K"),
+                 id="standard"),
+]
+
+
+@pytest.mark.xdist_group(name="output_formatting")
+@pytest.mark.parametrize("response_fixture,units,expected_tokens", UNIT_CASES)
+def test_format_weather_output_units(request, weather_cli, assert_contains_all,
+                                     response_fixture, units, expected_tokens):
+    """Test formatting of weather output across the supported unit systems."""
+    data = request.getfixturevalue(response_fixture)
+    output = weather_cli.format_weather_output(data, units=units)
+
+    assert_contains_all(output, expected_tokens)
+
+
+@pytest.mark.xdist_group(name="output_formatting")
+def test_format_weather_output_mutated_payload(weather_cli, real_weather_response,
+                                               real_weather_response_mut):
+    """Test formatting a locally modified payload without touching the shared one."""
+    real_weather_response_mut["main"]["temp"] = -40.0
+    del real_weather_response_mut["wind"]
+
+    output = weather_cli.format_weather_output(real_weather_response_mut)
+
+    assert "-40.0°C" in output
+    assert "N/A m/s" in output
+    # The session-shared fixture stays pristine.
+    assert real_weather_response["main"]["temp"] == 18.5
+    assert "wind" in real_weather_response
+
+
+@pytest.mark.xdist_group(name="output_formatting")
+def test_format_weather_output_missing_data(weather_cli):
+    """Test formatting with missing or incomplete data."""
+    incomplete_data = {
+        "name": "TestCity",
+        "sys": {},
+        "weather": [{}],
+        "main": {},
+        "wind": {},
+        "clouds": {}
+    }
 
-    @patch('weather_cli.requests.get')
-    def test_401_unauthorized_error(self, mock_get, weather_cli):
-        """Test handling of 401 Unauthorized (invalid API key)."""
-        mock_response = Mock()
-        mock_response.status_code = 401
-        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError()
-        mock_get.return_value = mock_response
+    output = weather_cli.format_weather_output(incomplete_data)
 
-        with pytest.raises(WeatherAPIError) as exc_info:
-            weather_cli.get_weather("London")
-        assert "Invalid API key" in str(exc_info.value)
+    assert "TestCity" in output
+    assert "N/A" in output
 
-    @patch('weather_cli.requests.get')
-    def test_404_city_not_found_error(self, mock_get, weather_cli):
-        """Test handling of 404 Not Found (invalid city)."""
-        mock_response = Mock()
-        mock_response.status_code = 404
-        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError()
-        mock_get.return_value = mock_response
 
-        with pytest.raises(WeatherAPIError) as exc_info:
-            weather_cli.get_weather("NonexistentCity123")
-        assert "City 'NonexistentCity123' not found" in str(exc_info.value)
+@pytest.mark.xdist_group(name="output_formatting")
+def test_format_weather_output_empty_weather_array(weather_cli):
+    """Test formatting when weather array is empty."""
+    data = {
+        "name": "TestCity",
+        "sys": {"country": "XX"},
+        "weather": [],
+        "main": {"temp": 20, "feels_like": 19, "temp_min": 18, "temp_max": 22, "humidity": 60, "pressure": 1000},
+        "wind": {"speed": 5, "deg": 180},
+        "clouds": {"all": 30}
+    }
 
-    @patch('weather_cli.requests.get')
-    def test_500_server_error(self, mock_get, weather_cli):
-        """Test handling of 500 Internal Server Error."""
-        mock_response = Mock()
-        mock_response.status_code = 500
-        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("500 Server Error")
-        mock_get.return_value = mock_response
+    output = weather_cli.format_weather_output(data)
+
+    assert "TestCity" in output
+    assert "N/A" in output  # Weather description should be N/A
+
+
+# Retry Tests
+
+@pytest.mark.xdist_group(name="retries")
+def test_transient_timeout_is_retried(mock_get, api_key, sample_weather_response,
+                                      make_mock_response, monkeypatch):
+    """Test that a transient timeout is retried and eventually succeeds."""
+    monkeypatch.setattr("weather_cli.time.sleep", lambda s: None)
+    cli = WeatherCLI(api_key=api_key, cache_ttl=0, max_retries=2)
+    mock_get.side_effect = [requests.exceptions.Timeout(),
+                            make_mock_response(sample_weather_response)]
+
+    assert cli.get_weather("London") == sample_weather_response
+    assert mock_get.call_count == 2
+
+
+@pytest.mark.xdist_group(name="retries")
+def test_retries_exhausted_raises(mock_get, api_key, monkeypatch):
+    """Test that persistent timeouts give up after max_retries attempts."""
+    monkeypatch.setattr("weather_cli.time.sleep", lambda s: None)
+    cli = WeatherCLI(api_key=api_key, cache_ttl=0, max_retries=2)
+    mock_get.side_effect = requests.exceptions.Timeout()
+
+    with pytest.raises(WeatherAPIError) as exc_info:
+        cli.get_weather("London")
+
+    assert "Request timed out" in str(exc_info.value)
+    assert mock_get.call_count == 3
+
+
+@pytest.mark.xdist_group(name="retries")
+def test_retryable_status_honors_retry_after(mock_get, api_key, sample_weather_response,
+                                             make_mock_response, monkeypatch):
+    """Test that a 503 with Retry-After is retried after the advertised delay."""
+    sleeps = []
+    monkeypatch.setattr("weather_cli.time.sleep", sleeps.append)
+    cli = WeatherCLI(api_key=api_key, cache_ttl=0, max_retries=1)
+    mock_get.side_effect = [FakeResponse(status_code=503, headers={"Retry-After": "7"}),
+                            make_mock_response(sample_weather_response)]
+
+    assert cli.get_weather("London") == sample_weather_response
+    assert sleeps and sleeps[0] >= 7
+
+
+@pytest.mark.xdist_group(name="retries")
+def test_non_retryable_status_fails_fast(mock_get, api_key):
+    """Test that a 404 is raised immediately without retrying."""
+    cli = WeatherCLI(api_key=api_key, cache_ttl=0, max_retries=3)
+    mock_get.return_value = FakeResponse(status_code=404,
+                                         raise_exc=requests.exceptions.HTTPError())
+
+    with pytest.raises(WeatherAPIError):
+        cli.get_weather("London")
+
+    mock_get.assert_called_once()
 
-        with pytest.raises(WeatherAPIError) as exc_info:
-            weather_cli.get_weather("London")
-        assert "HTTP error occurred" in str(exc_info.value)
 
-    @patch('weather_cli.requests.get')
-    def test_generic_request_exception(self, mock_get, weather_cli):
-        """Test handling of generic request exceptions."""
-        mock_get.side_effect = requests.exceptions.RequestException("Generic error")
+# Caching Tests
 
+@pytest.mark.xdist_group(name="caching")
+def test_cache_hit_skips_http_call(mock_get, api_key, sample_weather_response, make_mock_response):
+    """Test that a repeat query within the TTL is served from the cache."""
+    mock_get.return_value = make_mock_response(sample_weather_response)
+    cli = WeatherCLI(api_key=api_key)
+
+    first = cli.get_weather("London")
+    second = cli.get_weather("  london  ")  # same key after strip/casefold
+
+    assert first == second == sample_weather_response
+    mock_get.assert_called_once()
+
+
+@pytest.mark.xdist_group(name="caching")
+def test_cache_expires_after_ttl(mock_get, api_key, sample_weather_response, make_mock_response, monkeypatch):
+    """Test that entries older than the TTL are refetched."""
+    mock_get.return_value = make_mock_response(sample_weather_response)
+    cli = WeatherCLI(api_key=api_key, cache_ttl=60)
+
+    now = time.monotonic()
+    cli.get_weather("London")
+    monkeypatch.setattr("weather_cli.time.monotonic", lambda: now + 61)
+    cli.get_weather("London")
+
+    assert mock_get.call_count == 2
+
+
+@pytest.mark.xdist_group(name="caching")
+def test_cache_disabled_with_zero_ttl(mock_get, api_key, sample_weather_response, make_mock_response):
+    """Test that cache_ttl=0 disables caching entirely."""
+    mock_get.return_value = make_mock_response(sample_weather_response)
+    cli = WeatherCLI(api_key=api_key, cache_ttl=0)
+
+    cli.get_weather("London")
+    cli.get_weather("London")
+
+    assert mock_get.call_count == 2
+
+
+@pytest.mark.xdist_group(name="caching")
+def test_cached_payload_immune_to_caller_mutation(mock_get, api_key, sample_weather_response,
+                                                  make_mock_response):
+    """Test that mutating a returned payload cannot corrupt the cache."""
+    mock_get.return_value = make_mock_response(sample_weather_response)
+    cli = WeatherCLI(api_key=api_key)
+
+    first = cli.get_weather("London")
+    first["main"]["temp"] = -100
+    second = cli.get_weather("London")
+
+    assert second == sample_weather_response
+    mock_get.assert_called_once()
+
+
+@pytest.mark.xdist_group(name="caching")
+def test_failed_requests_are_not_cached(mock_get, api_key, sample_weather_response, make_mock_response):
+    """Test that error outcomes are not cached as successful responses."""
+    cli = WeatherCLI(api_key=api_key, max_retries=0)
+    mock_get.side_effect = requests.exceptions.ConnectionError()
+
+    with pytest.raises(WeatherAPIError):
+        cli.get_weather("London")
+
+    mock_get.side_effect = None
+    mock_get.return_value = make_mock_response(sample_weather_response)
+    assert cli.get_weather("London") == sample_weather_response
+
+
+@pytest.mark.xdist_group(name="caching")
+def test_not_found_is_negatively_cached(mock_get, api_key):
+    """Test that a repeated query for an unknown city skips the API."""
+    cli = WeatherCLI(api_key=api_key)
+    mock_get.return_value = FakeResponse(status_code=404,
+                                         raise_exc=requests.exceptions.HTTPError())
+
+    with pytest.raises(WeatherAPIError, match="not found"):
+        cli.get_weather("Lundon")
+    with pytest.raises(WeatherAPIError, match="not found"):
+        cli.get_weather("Lundon")
+
+    mock_get.assert_called_once()
+
+
+@pytest.mark.xdist_group(name="caching")
+def test_negative_cache_expires(mock_get, api_key, sample_weather_response,
+                                make_mock_response, monkeypatch):
+    """Test that the not-found memory is dropped after neg_ttl."""
+    cli = WeatherCLI(api_key=api_key, neg_ttl=60)
+    mock_get.return_value = FakeResponse(status_code=404,
+                                         raise_exc=requests.exceptions.HTTPError())
+
+    now = time.monotonic()
+    with pytest.raises(WeatherAPIError, match="not found"):
+        cli.get_weather("London")
+
+    monkeypatch.setattr("weather_cli.time.monotonic", lambda: now + 61)
+    mock_get.return_value = make_mock_response(sample_weather_response)
+    assert cli.get_weather("London") == sample_weather_response
+    assert mock_get.call_count == 2
+
+
+@pytest.mark.xdist_group(name="caching")
+def test_disk_cache_served_across_instances(mock_get, api_key, sample_weather_response,
+                                            make_mock_response, tmp_path):
+    """Test that a fresh instance is served from the on-disk cache without HTTP."""
+    mock_get.return_value = make_mock_response(sample_weather_response)
+
+    with WeatherCLI(api_key=api_key, cache_dir=str(tmp_path)) as first:
+        assert first.get_weather("London") == sample_weather_response
+
+    with WeatherCLI(api_key=api_key, cache_dir=str(tmp_path)) as second:
+        assert second.get_weather("London") == sample_weather_response
+
+    mock_get.assert_called_once()
+
+
+@pytest.mark.xdist_group(name="caching")
+def test_corrupt_disk_cache_treated_as_miss(mock_get, api_key, sample_weather_response,
+                                            make_mock_response, tmp_path):
+    """Test that a damaged cache row falls back to a fresh fetch."""
+    mock_get.return_value = make_mock_response(sample_weather_response)
+    with WeatherCLI(api_key=api_key, cache_dir=str(tmp_path)) as first:
+        first.get_weather("London")
+
+    # Corrupt the stored body: valid gzip wrapping that is not valid JSON.
+    conn = sqlite3.connect(str(tmp_path / "cache.db"))
+    conn.execute("UPDATE weather SET body = ?", (gzip.compress(b'{"broken'),))
+    conn.commit()
+    conn.close()
+
+    with WeatherCLI(api_key=api_key, cache_dir=str(tmp_path)) as second:
+        assert second.get_weather("London") == sample_weather_response
+
+    assert mock_get.call_count == 2
+
+
+@pytest.mark.xdist_group(name="caching")
+def test_expired_disk_entry_revalidated_with_304(mock_get, api_key, sample_weather_response,
+                                                 make_mock_response, tmp_path, monkeypatch):
+    """Test that a stale disk entry is revalidated and reused on 304."""
+    mock_get.return_value = make_mock_response(sample_weather_response,
+                                               headers={"ETag": '"abc123"'})
+    with WeatherCLI(api_key=api_key, cache_dir=str(tmp_path)) as first:
+        first.get_weather("London")
+
+    # Age the disk entry past the TTL but within the revalidation window.
+    now = time.time()
+    monkeypatch.setattr("weather_cli.time.time", lambda: now + 700)
+    mock_get.return_value = FakeResponse(status_code=304)
+    with WeatherCLI(api_key=api_key, cache_dir=str(tmp_path)) as second:
+        assert second.get_weather("London") == sample_weather_response
+
+    assert mock_get.call_count == 2
+    assert mock_get.call_args[1]["headers"]["If-None-Match"] == '"abc123"'
+
+
+# Async Multi-City Tests
+
+class FakeAiohttpResponse:
+    """Async counterpart of FakeResponse for stubbing aiohttp session.get."""
+
+    def __init__(self, status=200, payload=None, raise_exc=None):
+        self.status = status
+        self._payload = payload
+        self._raise_exc = raise_exc
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        if self._raise_exc is not None:
+            raise self._raise_exc
+
+    async def json(self):
+        return self._payload
+
+
+class FakeAiohttpSession:
+    """Stub session whose get() returns a canned response or raises."""
+
+    def __init__(self, response=None, raise_exc=None):
+        self._response = response
+        self._raise_exc = raise_exc
+
+    def get(self, url, params=None):
+        if self._raise_exc is not None:
+            raise self._raise_exc
+        return self._response
+
+
+@needs_aiohttp
+@pytest.mark.xdist_group(name="async_queries")
+@pytest.mark.parametrize("status,expected_message", [
+    pytest.param(401, "Invalid API key", id="401"),
+    pytest.param(404, "not found", id="404"),
+])
+def test_async_fetch_maps_status_errors(api_key, status, expected_message):
+    """Test that async 401/404 responses map to the sync path's messages."""
+    session = FakeAiohttpSession(FakeAiohttpResponse(status=status))
+    with AsyncWeatherCLI(api_key=api_key) as cli:
+        with pytest.raises(WeatherAPIError, match=expected_message):
+            asyncio.run(cli._fetch(session, "London", "metric"))
+
+
+@needs_aiohttp
+@pytest.mark.xdist_group(name="async_queries")
+@pytest.mark.parametrize("raise_exc,expected_message", [
+    pytest.param(asyncio.TimeoutError(), "timed out", id="timeout"),
+    pytest.param(None, "Connection error", id="client-error"),
+])
+def test_async_fetch_maps_transport_errors(api_key, raise_exc, expected_message):
+    """Test that async timeouts and transport failures map to WeatherAPIError."""
+    session = FakeAiohttpSession(raise_exc=raise_exc or aiohttp.ClientError())
+    with AsyncWeatherCLI(api_key=api_key) as cli:
+        with pytest.raises(WeatherAPIError, match=expected_message):
+            asyncio.run(cli._fetch(session, "London", "metric"))
+
+
+@needs_aiohttp
+@pytest.mark.xdist_group(name="async_queries")
+def test_async_fetch_http_error_omits_url(api_key):
+    """Test that other HTTP errors never leak the request URL (and API key)."""
+    error = aiohttp.ClientResponseError(request_info=None, history=(),
+                                        status=500, message="Internal Server Error")
+    session = FakeAiohttpSession(FakeAiohttpResponse(status=500, raise_exc=error))
+    with AsyncWeatherCLI(api_key=api_key) as cli:
         with pytest.raises(WeatherAPIError) as exc_info:
-            weather_cli.get_weather("London")
-        assert "An error occurred while fetching weather data" in str(exc_info.value)
+            asyncio.run(cli._fetch(session, "London", "metric"))
 
+    assert "HTTP error occurred: 500" in str(exc_info.value)
+    assert api_key not in str(exc_info.value)
 
-# Output Formatting Tests
-class TestOutputFormatting:
-    """Test weather data output formatting."""
-
-    def test_format_weather_output_metric(self, weather_cli, sample_weather_response):
-        """Test formatting of weather output with metric units."""
-        output = weather_cli.format_weather_output(sample_weather_response, units="metric")
-
-        assert "London" in output
-        assert "GB" in output
-        assert "Clear" in output
-        assert "clear sky" in output
-        assert "18.5°C" in output
-        assert "17.8°C" in output
-        assert "72%" in output
-        assert "1013 hPa" in output
-        assert "3.6 m/s" in output
-        assert "230°" in output
-        assert "20%" in output
-
-    def test_format_weather_output_imperial(self, weather_cli, sample_weather_response_imperial):
-        """Test formatting of weather output with imperial units."""
-        output = weather_cli.format_weather_output(sample_weather_response_imperial, units="imperial")
-
-        assert "New York" in output
-        assert "US" in output
-        assert "65.3°F" in output
-        assert "64.2°F" in output
-        assert "8.5 mph" in output
-
-    def test_format_weather_output_standard(self, weather_cli, sample_weather_response):
-        """Test formatting of weather output with standard (Kelvin) units."""
-        output = weather_cli.format_weather_output(sample_weather_response, units="standard")
-
-        # Standard units use Kelvin (no degree symbol added, just K)
-        assert "18.5K" in output
-        assert "17.8K" in output
-
-    def test_format_weather_output_missing_data(self, weather_cli):
-        """Test formatting with missing or incomplete data."""
-        incomplete_data = {
-            "name": "TestCity",
-            "sys": {},
-            "weather": [{}],
-            "main": {},
-            "wind": {},
-            "clouds": {}
-        }
 
-        output = weather_cli.format_weather_output(incomplete_data)
+@needs_aiohttp
+@pytest.mark.xdist_group(name="async_queries")
+def test_async_fetch_returns_payload(api_key, sample_weather_response):
+    """Test that a successful async fetch returns the parsed payload."""
+    session = FakeAiohttpSession(FakeAiohttpResponse(payload=sample_weather_response))
+    with AsyncWeatherCLI(api_key=api_key) as cli:
+        result = asyncio.run(cli._fetch(session, "London", "metric"))
 
-        assert "TestCity" in output
-        assert "N/A" in output
+    assert result == sample_weather_response
 
-    def test_format_weather_output_empty_weather_array(self, weather_cli):
-        """Test formatting when weather array is empty."""
-        data = {
-            "name": "TestCity",
-            "sys": {"country": "XX"},
-            "weather": [],
-            "main": {"temp": 20, "feels_like": 19, "temp_min": 18, "temp_max": 22, "humidity": 60, "pressure": 1000},
-            "wind": {"speed": 5, "deg": 180},
-            "clouds": {"all": 30}
-        }
 
-        output = weather_cli.format_weather_output(data)
+@needs_aiohttp
+@pytest.mark.xdist_group(name="async_queries")
+def test_get_weather_many_aligns_results_with_cities(api_key, monkeypatch):
+    """Test that per-city failures stay aligned with their position."""
+    async def fake_fetch(self, session, city, units):
+        if city == "Atlantis":
+            raise WeatherAPIError(f"City '{city}' not found. Please check the city name.")
+        return {"name": city}
+
+    monkeypatch.setattr(AsyncWeatherCLI, "_fetch", fake_fetch)
+    with AsyncWeatherCLI(api_key=api_key) as cli:
+        results = asyncio.run(cli.get_weather_many(["London", "Atlantis", "Paris"]))
 
-        assert "TestCity" in output
-        assert "N/A" in output  # Weather description should be N/A
+    assert results[0] == {"name": "London"}
+    assert isinstance(results[1], WeatherAPIError)
+    assert results[2] == {"name": "Paris"}
 
 
 # Main Function Tests
-class TestMainFunction:
-    """Test the main CLI entry point."""
-
-    @patch('weather_cli.WeatherCLI')
-    @patch('sys.argv', ['weather_cli.py', 'London'])
-    def test_main_success(self, mock_weather_cli_class, sample_weather_response, capsys):
-        """Test successful main function execution."""
-        mock_instance = Mock()
-        mock_instance.get_weather.return_value = sample_weather_response
-        mock_instance.format_weather_output.return_value = "Weather output"
-        mock_weather_cli_class.return_value = mock_instance
-
-        exit_code = main()
-
-        assert exit_code == 0
-        captured = capsys.readouterr()
-        assert "Weather output" in captured.out
-
-    @patch('weather_cli.WeatherCLI')
-    @patch('sys.argv', ['weather_cli.py', 'London', '--units', 'imperial'])
-    def test_main_with_imperial_units(self, mock_weather_cli_class, sample_weather_response_imperial):
-        """Test main function with imperial units argument."""
-        mock_instance = Mock()
-        mock_instance.get_weather.return_value = sample_weather_response_imperial
-        mock_instance.format_weather_output.return_value = "Weather output"
-        mock_weather_cli_class.return_value = mock_instance
-
-        exit_code = main()
-
-        assert exit_code == 0
-        mock_instance.get_weather.assert_called_once_with('London', 'imperial')
-
-    @patch('weather_cli.WeatherCLI')
-    @patch('sys.argv', ['weather_cli.py', 'Paris', '--api-key', 'custom_key'])
-    def test_main_with_custom_api_key(self, mock_weather_cli_class, sample_weather_response):
-        """Test main function with custom API key argument."""
-        mock_instance = Mock()
-        mock_instance.get_weather.return_value = sample_weather_response
-        mock_instance.format_weather_output.return_value = "Weather output"
-        mock_weather_cli_class.return_value = mock_instance
-
-        exit_code = main()
-
-        assert exit_code == 0
-        mock_weather_cli_class.assert_called_once_with(api_key='custom_key')
-
-    @patch('weather_cli.WeatherCLI')
-    @patch('sys.argv', ['weather_cli.py', 'InvalidCity'])
-    def test_main_api_error(self, mock_weather_cli_class, capsys):
-        """Test main function handling of API errors."""
-        mock_instance = Mock()
-        mock_instance.get_weather.side_effect = WeatherAPIError("City not found")
-        mock_weather_cli_class.return_value = mock_instance
-
-        exit_code = main()
-
-        assert exit_code == 1
-        captured = capsys.readouterr()
-        assert "Error: City not found" in captured.err
-
-    @patch('weather_cli.WeatherCLI')
-    @patch('sys.argv', ['weather_cli.py', 'London'])
-    def test_main_keyboard_interrupt(self, mock_weather_cli_class, capsys):
-        """Test main function handling of keyboard interrupt."""
-        mock_instance = Mock()
-        mock_instance.get_weather.side_effect = KeyboardInterrupt()
-        mock_weather_cli_class.return_value = mock_instance
-
-        exit_code = main()
-
-        assert exit_code == 130
-        captured = capsys.readouterr()
-        assert "Operation cancelled by user" in captured.err
-
-    @patch('weather_cli.WeatherCLI')
-    @patch('sys.argv', ['weather_cli.py', 'London'])
-    def test_main_unexpected_error(self, mock_weather_cli_class, capsys):
-        """Test main function handling of unexpected errors."""
-        mock_instance = Mock()
-        mock_instance.get_weather.side_effect = Exception("Unexpected error")
-        mock_weather_cli_class.return_value = mock_instance
-
-        exit_code = main()
-
-        assert exit_code == 1
-        captured = capsys.readouterr()
-        assert "Unexpected error" in captured.err
+
+@pytest.mark.xdist_group(name="main_function")
+@patch('weather_cli.WeatherCLI')
+def test_main_success(mock_weather_cli_class, sample_weather_response, capsys):
+    """Test successful main function execution."""
+    mock_instance = Mock(spec_set=WeatherCLI)
+    mock_instance.get_weather.return_value = sample_weather_response
+    mock_instance.format_weather_output.return_value = "Weather output"
+    mock_weather_cli_class.return_value = mock_instance
+
+    exit_code = main(['London'])
+
+    assert exit_code == 0
+    captured = capsys.readouterr()
+    assert "Weather output" in captured.out
+
+
+@pytest.mark.xdist_group(name="main_function")
+@pytest.mark.usefixtures("nocapture")
+@patch('weather_cli.WeatherCLI')
+def test_main_with_imperial_units(mock_weather_cli_class, sample_weather_response_imperial):
+    """Test main function with imperial units argument."""
+    mock_instance = Mock(spec_set=WeatherCLI)
+    mock_instance.get_weather.return_value = sample_weather_response_imperial
+    mock_instance.format_weather_output.return_value = "Weather output"
+    mock_weather_cli_class.return_value = mock_instance
+
+    exit_code = main(['London', '--units', 'imperial'])
+
+    assert exit_code == 0
+    assert mock_weather_cli_class.call_args.kwargs['units'] == 'imperial'
+    mock_instance.get_weather.assert_called_once_with('London')
+
+
+@pytest.mark.xdist_group(name="main_function")
+@pytest.mark.usefixtures("nocapture")
+@patch('weather_cli.WeatherCLI')
+def test_main_with_custom_api_key(mock_weather_cli_class, sample_weather_response):
+    """Test main function with custom API key argument."""
+    mock_instance = Mock(spec_set=WeatherCLI)
+    mock_instance.get_weather.return_value = sample_weather_response
+    mock_instance.format_weather_output.return_value = "Weather output"
+    mock_weather_cli_class.return_value = mock_instance
+
+    exit_code = main(['Paris', '--api-key', 'custom_key'])
+
+    assert exit_code == 0
+    # The class is patched, so the defaults main reads off it are the mock's
+    # own attributes.
+    mock_weather_cli_class.assert_called_once_with(
+        api_key='custom_key', units='metric',
+        cache_ttl=mock_weather_cli_class.DEFAULT_CACHE_TTL,
+        cache_dir=mock_weather_cli_class.DEFAULT_CACHE_DIR)
+
+
+@pytest.mark.xdist_group(name="main_function")
+@pytest.mark.usefixtures("nocapture")
+@patch('weather_cli.WeatherCLI')
+def test_main_no_cache_flag(mock_weather_cli_class, sample_weather_response):
+    """Test that --no-cache disables both the in-memory and on-disk caches."""
+    mock_instance = Mock(spec_set=WeatherCLI)
+    mock_instance.get_weather.return_value = sample_weather_response
+    mock_instance.format_weather_output.return_value = "Weather output"
+    mock_weather_cli_class.return_value = mock_instance
+
+    exit_code = main(['London', '--no-cache'])
+
+    assert exit_code == 0
+    mock_weather_cli_class.assert_called_once_with(
+        api_key=None, units='metric', cache_ttl=0, cache_dir=None)
+
+
+# Daemon Mode Tests
+
+@pytest.mark.xdist_group(name="daemon")
+def test_daemon_serves_queries_over_socket(mock_get, api_key, sample_weather_response,
+                                           make_mock_response, tmp_path):
+    """Test that a daemon answers client queries and reuses its warm cache."""
+    mock_get.return_value = make_mock_response(sample_weather_response)
+    socket_path = str(tmp_path / "sock")
+    cli = WeatherCLI(api_key=api_key)
+    threading.Thread(target=run_daemon, args=(cli, socket_path), daemon=True).start()
+    for _ in range(100):
+        if os.path.exists(socket_path):
+            break
+        time.sleep(0.01)
+
+    ok, output = query_daemon("London", "metric", socket_path=socket_path)
+    assert ok
+    assert "London" in output
+
+    # Second query is served from the daemon's in-memory cache.
+    ok, _ = query_daemon("London", "metric", socket_path=socket_path)
+    assert ok
+    mock_get.assert_called_once()
+
+
+@pytest.mark.xdist_group(name="daemon")
+def test_daemon_reports_errors_to_client(mock_get, api_key, tmp_path):
+    """Test that a daemon-side WeatherAPIError comes back as a failed reply."""
+    mock_get.return_value = FakeResponse(status_code=404,
+                                         raise_exc=requests.exceptions.HTTPError())
+    socket_path = str(tmp_path / "sock")
+    cli = WeatherCLI(api_key=api_key)
+    threading.Thread(target=run_daemon, args=(cli, socket_path), daemon=True).start()
+    for _ in range(100):
+        if os.path.exists(socket_path):
+            break
+        time.sleep(0.01)
+
+    ok, output = query_daemon("Nowheresville", "metric", socket_path=socket_path)
+    assert not ok
+    assert "not found" in output
+
+
+@pytest.mark.xdist_group(name="daemon")
+def test_daemon_survives_client_disconnect(mock_get, api_key, sample_weather_response,
+                                           make_mock_response, tmp_path):
+    """Test that a client hanging up before the reply doesn't kill the daemon."""
+    mock_get.return_value = make_mock_response(sample_weather_response)
+    socket_path = str(tmp_path / "sock")
+    cli = WeatherCLI(api_key=api_key)
+    threading.Thread(target=run_daemon, args=(cli, socket_path), daemon=True).start()
+    for _ in range(100):
+        if os.path.exists(socket_path):
+            break
+        time.sleep(0.01)
+
+    # Send a query and close without ever reading the reply.
+    rude_client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    rude_client.connect(socket_path)
+    rude_client.sendall(b'{"city": "London", "units": "metric"}\n')
+    rude_client.close()
+
+    ok, output = query_daemon("London", "metric", socket_path=socket_path)
+    assert ok
+    assert "London" in output
+
+
+@pytest.mark.xdist_group(name="daemon")
+def test_query_daemon_rejects_malformed_reply(tmp_path):
+    """Test that a half-written daemon reply surfaces as OSError."""
+    socket_path = str(tmp_path / "sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+
+    def serve_garbage():
+        conn, _ = server.accept()
+        with conn:
+            conn.recv(4096)
+            conn.sendall(b'{"ok"')
+
+    threading.Thread(target=serve_garbage, daemon=True).start()
+
+    with pytest.raises(OSError, match="Malformed reply"):
+        query_daemon("London", "metric", socket_path=socket_path)
+    server.close()
+
+
+@pytest.mark.xdist_group(name="daemon")
+@pytest.mark.usefixtures("nocapture")
+@patch('weather_cli.WeatherCLI')
+def test_main_falls_back_when_daemon_unreachable(mock_weather_cli_class, sample_weather_response,
+                                                 tmp_path, monkeypatch):
+    """Test that a stale daemon socket falls back to an in-process fetch."""
+    stale_socket = tmp_path / "sock"
+    stale_socket.write_text("")  # path exists, but nothing is listening
+    monkeypatch.setattr("weather_cli._daemon_socket_path", lambda: str(stale_socket))
+    mock_instance = Mock(spec_set=WeatherCLI)
+    mock_instance.get_weather.return_value = sample_weather_response
+    mock_instance.format_weather_output.return_value = "Weather output"
+    mock_weather_cli_class.return_value = mock_instance
+
+    exit_code = main(['London'])
+
+    assert exit_code == 0
+    mock_instance.get_weather.assert_called_once_with('London')
+
+
+@pytest.mark.xdist_group(name="main_function")
+@patch('weather_cli.WeatherCLI')
+def test_main_multiple_cities(mock_weather_cli_class, sample_weather_response, capsys, monkeypatch):
+    """Test main function with several cities prints one report per city."""
+    # Force the sequential fallback so the mocked WeatherCLI serves all cities.
+    monkeypatch.setattr("weather_cli.aiohttp", None)
+    mock_instance = Mock(spec_set=WeatherCLI)
+    mock_instance.get_weather.return_value = sample_weather_response
+    mock_instance.format_weather_output.return_value = "Weather output"
+    mock_weather_cli_class.return_value = mock_instance
+
+    exit_code = main(['London', 'Paris'])
+
+    assert exit_code == 0
+    assert mock_instance.get_weather.call_count == 2
+    captured = capsys.readouterr()
+    assert captured.out.count("Weather output") == 2
+
+
+@pytest.mark.xdist_group(name="main_function")
+@patch('weather_cli.WeatherCLI')
+def test_main_api_error(mock_weather_cli_class, capsys):
+    """Test main function handling of API errors."""
+    mock_instance = Mock(spec_set=WeatherCLI)
+    mock_instance.get_weather.side_effect = WeatherAPIError("City not found")
+    mock_weather_cli_class.return_value = mock_instance
+
+    exit_code = main(['InvalidCity'])
+
+    assert exit_code == 1
+    captured = capsys.readouterr()
+    assert "Error: City not found" in captured.err
+
+
+@pytest.mark.xdist_group(name="main_function")
+@patch('weather_cli.WeatherCLI')
+def test_main_keyboard_interrupt(mock_weather_cli_class, capsys):
+    """Test main function handling of keyboard interrupt."""
+    mock_instance = Mock(spec_set=WeatherCLI)
+    mock_instance.get_weather.side_effect = KeyboardInterrupt()
+    mock_weather_cli_class.return_value = mock_instance
+
+    exit_code = main(['London'])
+
+    assert exit_code == 130
+    captured = capsys.readouterr()
+    assert "Operation cancelled by user" in captured.err
+
+
+@pytest.mark.xdist_group(name="main_function")
+@patch('weather_cli.WeatherCLI')
+def test_main_unexpected_error(mock_weather_cli_class, capsys):
+    """Test main function handling of unexpected errors."""
+    mock_instance = Mock(spec_set=WeatherCLI)
+    mock_instance.get_weather.side_effect = Exception("Unexpected error")
+    mock_weather_cli_class.return_value = mock_instance
+
+    exit_code = main(['London'])
+
+    assert exit_code == 1
+    captured = capsys.readouterr()
+    assert "Unexpected error" in captured.err
 
 
 # Integration-Style Tests (with mocked requests)
-class TestIntegrationScenarios:
-    """Test realistic end-to-end scenarios with mocked API."""
-
-    @patch('weather_cli.requests.get')
-    def test_complete_workflow_metric(self, mock_get, api_key, sample_weather_response):
-        """Test complete workflow: initialize -> fetch -> format with metric units."""
-        mock_response = Mock()
-        mock_response.json.return_value = sample_weather_response
-        mock_response.raise_for_status = Mock()
-        mock_get.return_value = mock_response
-
-        cli = WeatherCLI(api_key=api_key)
-        weather_data = cli.get_weather("London", units="metric")
-        output = cli.format_weather_output(weather_data, units="metric")
-
-        assert "London" in output
-        assert "°C" in output
-        assert "m/s" in output
-
-    @patch('weather_cli.requests.get')
-    def test_complete_workflow_imperial(self, mock_get, api_key, sample_weather_response_imperial):
-        """Test complete workflow with imperial units."""
-        mock_response = Mock()
-        mock_response.json.return_value = sample_weather_response_imperial
-        mock_response.raise_for_status = Mock()
-        mock_get.return_value = mock_response
-
-        cli = WeatherCLI(api_key=api_key)
-        weather_data = cli.get_weather("New York", units="imperial")
-        output = cli.format_weather_output(weather_data, units="imperial")
-
-        assert "New York" in output
-        assert "°F" in output
-        assert "mph" in output
-
-    @patch('weather_cli.requests.get')
-    def test_multiple_cities_sequential(self, mock_get, api_key, sample_weather_response):
-        """Test fetching weather for multiple cities sequentially."""
-        mock_response = Mock()
-        mock_response.json.return_value = sample_weather_response
-        mock_response.raise_for_status = Mock()
-        mock_get.return_value = mock_response
-
-        cli = WeatherCLI(api_key=api_key)
-
-        cities = ["London", "Paris", "Berlin"]
-        for city in cities:
-            result = cli.get_weather(city)
-            assert result == sample_weather_response
-
-        assert mock_get.call_count == len(cities)
+
+@pytest.mark.xdist_group(name="integration_scenarios")
+def test_complete_workflow_metric(mock_get, api_key, sample_weather_response,
+                                  make_mock_response, assert_contains_all):
+    """Test complete workflow: initialize -> fetch -> format with metric units."""
+    mock_get.return_value = make_mock_response(sample_weather_response)
+
+    cli = WeatherCLI(api_key=api_key)
+    weather_data = cli.get_weather("London", units="metric")
+    output = cli.format_weather_output(weather_data, units="metric")
+
+    assert_contains_all(output, ("London", "°C", "m/s"))
+
+
+@pytest.mark.xdist_group(name="integration_scenarios")
+def test_complete_workflow_imperial(mock_get, api_key, sample_weather_response_imperial,
+                                    make_mock_response, assert_contains_all):
+    """Test complete workflow with imperial units."""
+    mock_get.return_value = make_mock_response(sample_weather_response_imperial)
+
+    cli = WeatherCLI(api_key=api_key)
+    weather_data = cli.get_weather("New York", units="imperial")
+    output = cli.format_weather_output(weather_data, units="imperial")
+
+    assert_contains_all(output, ("New York", "°F", "mph"))
+
+
+@pytest.mark.xdist_group(name="integration_scenarios")
+def test_multiple_cities_sequential(mock_get, api_key, sample_weather_response, make_mock_response):
+    """Test fetching weather for multiple cities sequentially."""
+    mock_get.return_value = make_mock_response(sample_weather_response)
+
+    cli = WeatherCLI(api_key=api_key)
+
+    cities = ["London", "Paris", "Berlin"]
+    for city in cities:
+        result = cli.get_weather(city)
+        assert result == sample_weather_response
+
+    assert mock_get.call_count == len(cities)
 
 
 # Edge Case Tests
-class TestEdgeCases:
-    """Test edge cases and boundary conditions."""
 
-    @patch('weather_cli.requests.get')
-    def test_city_with_special_characters(self, mock_get, weather_cli, sample_weather_response):
-        """Test city names with special characters."""
-        mock_response = Mock()
-        mock_response.json.return_value = sample_weather_response
-        mock_response.raise_for_status = Mock()
-        mock_get.return_value = mock_response
+@pytest.mark.xdist_group(name="edge_cases")
+def test_city_with_special_characters(mock_get, weather_cli, sample_weather_response, make_mock_response):
+    """Test city names with special characters."""
+    mock_get.return_value = make_mock_response(sample_weather_response)
 
-        weather_cli.get_weather("São Paulo")
+    weather_cli.get_weather("São Paulo")
 
-        call_args = mock_get.call_args
-        assert call_args[1]['params']['q'] == "São Paulo"
+    call_args = mock_get.call_args
+    assert call_args[1]['params']['q'] == "São Paulo"
 
-    @patch('weather_cli.requests.get')
-    def test_city_with_spaces(self, mock_get, weather_cli, sample_weather_response):
-        """Test city names with multiple words."""
-        mock_response = Mock()
-        mock_response.json.return_value = sample_weather_response
-        mock_response.raise_for_status = Mock()
-        mock_get.return_value = mock_response
 
-        weather_cli.get_weather("New York City")
+@pytest.mark.xdist_group(name="edge_cases")
+def test_city_with_spaces(mock_get, weather_cli, sample_weather_response, make_mock_response):
+    """Test city names with multiple words."""
+    mock_get.return_value = make_mock_response(sample_weather_response)
 
-        call_args = mock_get.call_args
-        assert call_args[1]['params']['q'] == "New York City"
+    weather_cli.get_weather("New York City")
 
-    def test_weather_api_error_exception(self):
-        """Test WeatherAPIError exception can be raised and caught."""
-        with pytest.raises(WeatherAPIError) as exc_info:
-            raise WeatherAPIError("Test error message")
-        assert "Test error message" in str(exc_info.value)
+    call_args = mock_get.call_args
+    assert call_args[1]['params']['q'] == "New York City"
+
+
+@pytest.mark.xdist_group(name="edge_cases")
+def test_weather_api_error_exception():
+    """Test WeatherAPIError exception can be raised and caught."""
+    with pytest.raises(WeatherAPIError) as exc_info:
+        raise WeatherAPIError("Test error message")
+    assert "Test error message" in str(exc_info.value)
 
-    def test_weather_api_error_is_exception(self):
-        """Test that WeatherAPIError inherits from Exception."""
-        assert issubclass(WeatherAPIError, Exception)
+
+@pytest.mark.xdist_group(name="edge_cases")
+def test_weather_api_error_is_exception():
+    """Test that WeatherAPIError inherits from Exception."""
+    assert issubclass(WeatherAPIError, Exception)
 
 
 # Constants and Configuration Tests
-class TestConfiguration:
-    """Test configuration and constants."""
 
-    def test_base_url_constant(self):
-        """Test that BASE_URL is correctly set."""
-        assert WeatherCLI.BASE_URL == "https://api.openweathermap.org/data/2.5/weather"
+@pytest.mark.xdist_group(name="configuration")
+def test_invalid_units_rejected_at_construction(api_key):
+    """Test that an unknown unit system is rejected when the client is built."""
+    with pytest.raises(WeatherAPIError, match="Unknown unit system"):
+        WeatherCLI(api_key=api_key, units="kelvin")
+
+
+@pytest.mark.xdist_group(name="configuration")
+def test_base_url_constant():
+    """Test that BASE_URL is correctly set."""
+    assert WeatherCLI.BASE_URL == "https://api.openweathermap.org/data/2.5/weather"
+
 
-    def test_base_url_https(self):
-        """Test that BASE_URL uses HTTPS."""
-        assert WeatherCLI.BASE_URL.startswith("https://")
+@pytest.mark.xdist_group(name="configuration")
+def test_base_url_https():
+    """Test that BASE_URL uses HTTPS."""
+    assert WeatherCLI.BASE_URL.startswith("https://")
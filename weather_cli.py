@@ -4,10 +4,145 @@ Weather CLI - A command-line tool to fetch current weather from OpenWeatherMap A
 """
 
 import argparse
+import asyncio
+import copy
+import functools
+import gzip
+import json
 import os
+import random
+import socket
+import sqlite3
 import sys
-from typing import Optional, Dict, Any
+import time
+import zlib
+from typing import List, Optional, Dict, Any
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _parse_json(payload: bytes) -> Dict[str, Any]:
+    """Parse a JSON response body, using orjson when installed for its C-speed decoder."""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+class _DiskCache:
+    """
+    Small sqlite-backed response cache shared across CLI invocations.
+
+    Each CLI run is a fresh process, so the in-memory cache alone cannot help
+    repeat invocations; this store persists responses (gzip-compressed JSON)
+    keyed by units and city.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS weather "
+                "(key TEXT PRIMARY KEY, ts REAL, body BLOB, etag TEXT, last_modified TEXT)"
+            )
+            # Databases written before the validator columns existed are
+            # upgraded in place.
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(weather)")}
+            for column in ("etag", "last_modified"):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE weather ADD COLUMN {column} TEXT")
+        return self._conn
+
+    def get(self, key: str, ttl: int) -> Optional[Dict[str, Any]]:
+        """Return the cached payload for key, or None if absent or older than ttl."""
+        row = self._connect().execute(
+            "SELECT ts, body FROM weather WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or time.time() - row[0] >= ttl:
+            return None
+        return _parse_json(gzip.decompress(row[1]))
+
+    def get_entry(self, key: str) -> Optional[tuple]:
+        """Return (ts, payload, etag, last_modified) for key, or None if absent."""
+        row = self._connect().execute(
+            "SELECT ts, body, etag, last_modified FROM weather WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return (row[0], _parse_json(gzip.decompress(row[1])), row[2], row[3])
+
+    def set(self, key: str, data: Dict[str, Any],
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Store a payload for key, replacing any previous entry."""
+        body = gzip.compress(json.dumps(data).encode("utf-8"))
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO weather (key, ts, body, etag, last_modified) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, time.time(), body, etag, last_modified)
+        )
+        conn.commit()
+
+    def touch(self, key: str) -> None:
+        """Refresh the timestamp of an entry the server confirmed is still current."""
+        conn = self._connect()
+        conn.execute("UPDATE weather SET ts = ? WHERE key = ?", (time.time(), key))
+        conn.commit()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+# Sentinel cached in place of a payload for cities the API reported as unknown.
+_NOT_FOUND = object()
+
+# Unit symbols per unit system: (temperature, wind speed).
+_UNITS = {
+    "metric": ("°C", "m/s"),
+    "imperial": ("°F", "mph"),
+    "standard": ("K", "m/s"),
+}
+
+# Output layout, compiled once at import time and filled per response.
+_OUTPUT_TEMPLATE = """
+╔════════════════════════════════════════════════════════════╗
+║  Weather Information for {city_name}, {country}
+╚════════════════════════════════════════════════════════════╝
+
+🌤️  Condition: {weather_main} ({weather_desc})
+
+🌡️  Temperature:
+    Current:    {temp}{temp_unit}
+    Feels Like: {feels_like}{temp_unit}
+    Min/Max:    {temp_min}{temp_unit} / {temp_max}{temp_unit}
+
+💧 Humidity:    {humidity}%
+🔽 Pressure:    {pressure} hPa
+
+💨 Wind:
+    Speed:      {wind_speed} {speed_unit}
+    Direction:  {wind_deg}°
+
+☁️  Cloudiness: {clouds}%
+"""
 
 
 class WeatherAPIError(Exception):
@@ -20,15 +155,49 @@ class WeatherCLI:
 
     BASE_URL = "https://api.openweathermap.org/data/2.5/weather"
 
-    def __init__(self, api_key: Optional[str] = None):
+    # OpenWeatherMap refreshes current-weather data roughly every 10 minutes,
+    # so cached responses younger than that are as good as a fresh fetch.
+    DEFAULT_CACHE_TTL = 600
+
+    # Transient statuses worth retrying; 4xx errors other than 429 are final.
+    RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+    # Unknown-city (404) results are remembered briefly too, so tight loops
+    # over a typo'd name don't burn rate-limit budget. Kept short so genuine
+    # new cities show up quickly.
+    DEFAULT_NEG_TTL = 60
+
+    # Default location of the on-disk cache used by the CLI entry point.
+    DEFAULT_CACHE_DIR = os.path.join("~", ".cache", "weather-cli")
+
+    # Disk entries older than the TTL but younger than this are revalidated
+    # with a conditional request instead of a full fetch: a 304 answer skips
+    # the body transfer and the JSON parse.
+    REVALIDATE_WINDOW = 24 * 3600
+
+    def __init__(self, api_key: Optional[str] = None, units: str = "metric",
+                 cache_ttl: int = DEFAULT_CACHE_TTL,
+                 max_retries: int = 3, backoff_base: float = 0.5,
+                 cache_dir: Optional[str] = None, neg_ttl: int = DEFAULT_NEG_TTL):
         """
         Initialize the Weather CLI.
 
         Args:
             api_key: OpenWeatherMap API key. If not provided, reads from OPENWEATHER_API_KEY env variable.
+            units: Default unit system ('metric', 'imperial', or 'standard')
+                for queries that don't pass one explicitly.
+            cache_ttl: Seconds to serve repeated queries from the cache. 0 disables caching.
+            max_retries: Number of retries for transient failures (timeouts,
+                connection errors, 429/5xx responses). 0 disables retrying.
+            backoff_base: Base delay in seconds for exponential backoff between retries.
+            cache_dir: Directory for the persistent sqlite response cache.
+                None keeps the cache in-process only.
+            neg_ttl: Seconds to remember that a city was not found (404)
+                before asking the API again. 0 disables negative caching.
 
         Raises:
-            WeatherAPIError: If no API key is provided or found in environment.
+            WeatherAPIError: If no API key is provided or found in environment,
+                or if units names an unknown unit system.
         """
         self.api_key = api_key or os.getenv("OPENWEATHER_API_KEY")
         if not self.api_key:
@@ -36,16 +205,63 @@ class WeatherCLI:
                 "No API key provided. Set OPENWEATHER_API_KEY environment variable or pass it as an argument."
             )
 
-    def get_weather(self, city: str, units: str = "metric") -> Dict[str, Any]:
+        # Validate once here so per-query code can use the precomputed symbols
+        # without re-checking the units string.
+        if units not in _UNITS:
+            raise WeatherAPIError(
+                f"Unknown unit system '{units}'. Choose from: {', '.join(_UNITS)}."
+            )
+        self.units = units
+        self._temp_unit, self._speed_unit = _UNITS[units]
+
+        self.cache_ttl = cache_ttl
+        self.neg_ttl = neg_ttl
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        # Maps (casefolded city, units) -> (monotonic timestamp, payload).
+        # Only successful responses are cached.
+        self._cache: Dict[tuple, tuple] = {}
+        self._disk_cache: Optional[_DiskCache] = None
+        if cache_dir is not None:
+            path = os.path.join(os.path.expanduser(cache_dir), "cache.db")
+            self._disk_cache = _DiskCache(path)
+
+        # One session per instance: keep-alive reuses the TCP/TLS connection
+        # for subsequent requests instead of paying a fresh handshake each time.
+        # Everything goes to a single host, so one urllib3 pool is enough.
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        # Advertise gzip explicitly: the ~1-2 KB JSON bodies compress to a
+        # fraction of that, and requests decompresses transparently.
+        self._session.headers.update({
+            "User-Agent": "weather-cli/1.0",
+            "Accept-Encoding": "gzip, deflate",
+        })
+
+    def close(self):
+        """Close the underlying HTTP session and the on-disk cache, if any."""
+        self._session.close()
+        if self._disk_cache is not None:
+            self._disk_cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_weather(self, city: str, units: Optional[str] = None) -> Dict[str, Any]:
         """
         Fetch weather data for a specific city.
 
         Args:
             city: Name of the city to get weather for.
-            units: Unit system ('metric', 'imperial', or 'standard'). Default is 'metric'.
+            units: Unit system ('metric', 'imperial', or 'standard').
+                Defaults to the unit system the instance was built with.
 
         Returns:
-            Dictionary containing weather data.
+            Dictionary containing weather data. Repeated queries for the same
+            city and units within the cache TTL are served from memory.
 
         Raises:
             WeatherAPIError: If the API request fails or returns an error.
@@ -53,89 +269,392 @@ class WeatherCLI:
         if not city or not city.strip():
             raise WeatherAPIError("City name cannot be empty.")
 
+        if units is None:
+            units = self.units
+        city = city.strip()
+        cache_key = (city.casefold(), units)
+
+        stale_entry = None
+        conditional_headers = None
+        if self.cache_ttl:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                age = time.monotonic() - cached[0]
+                if cached[1] is _NOT_FOUND:
+                    if age < self.neg_ttl:
+                        raise WeatherAPIError(
+                            f"City '{city}' not found. Please check the city name.")
+                elif age < self.cache_ttl:
+                    # Hand out a copy so callers can't corrupt the cached payload.
+                    return copy.deepcopy(cached[1])
+
+            disk_data = self._disk_cache_get(cache_key)
+            if disk_data is not None:
+                self._cache[cache_key] = (time.monotonic(), disk_data)
+                return copy.deepcopy(disk_data)
+
+            # An expired disk entry with validators is still useful: ask the
+            # server whether it changed and reuse the stored body on a 304.
+            stale_entry = self._disk_cache_entry(cache_key)
+            if stale_entry is not None:
+                ts, _, etag, last_modified = stale_entry
+                if time.time() - ts < self.REVALIDATE_WINDOW and (etag or last_modified):
+                    conditional_headers = {}
+                    if etag:
+                        conditional_headers["If-None-Match"] = etag
+                    if last_modified:
+                        conditional_headers["If-Modified-Since"] = last_modified
+                else:
+                    stale_entry = None
+
         params = {
-            "q": city.strip(),
+            "q": city,
             "appid": self.api_key,
             "units": units
         }
 
-        try:
-            response = requests.get(self.BASE_URL, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.Timeout:
-            raise WeatherAPIError("Request timed out. Please check your internet connection.")
-        except requests.exceptions.ConnectionError:
-            raise WeatherAPIError("Connection error. Please check your internet connection.")
-        except requests.exceptions.HTTPError as e:
-            if response.status_code == 401:
-                raise WeatherAPIError("Invalid API key. Please check your OPENWEATHER_API_KEY.")
-            elif response.status_code == 404:
-                raise WeatherAPIError(f"City '{city}' not found. Please check the city name.")
+        last_error: Optional[WeatherAPIError] = None
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = self._session.get(self.BASE_URL, params=params, timeout=10,
+                                             headers=conditional_headers)
+            except requests.exceptions.Timeout:
+                last_error = WeatherAPIError("Request timed out. Please check your internet connection.")
+            except requests.exceptions.ConnectionError:
+                last_error = WeatherAPIError("Connection error. Please check your internet connection.")
+            except requests.exceptions.RequestException as e:
+                raise WeatherAPIError(f"An error occurred while fetching weather data: {e}")
             else:
-                raise WeatherAPIError(f"HTTP error occurred: {e}")
-        except requests.exceptions.RequestException as e:
-            raise WeatherAPIError(f"An error occurred while fetching weather data: {e}")
+                if response.status_code == 304 and stale_entry is not None:
+                    data = stale_entry[1]
+                    self._disk_cache_touch(cache_key)
+                    self._cache[cache_key] = (time.monotonic(), data)
+                    return copy.deepcopy(data)
+                if response.status_code not in self.RETRY_STATUS_CODES or attempt == self.max_retries:
+                    try:
+                        response.raise_for_status()
+                    except requests.exceptions.HTTPError as e:
+                        if response.status_code == 401:
+                            raise WeatherAPIError("Invalid API key. Please check your OPENWEATHER_API_KEY.")
+                        elif response.status_code == 404:
+                            if self.cache_ttl and self.neg_ttl:
+                                self._cache[cache_key] = (time.monotonic(), _NOT_FOUND)
+                            raise WeatherAPIError(f"City '{city}' not found. Please check the city name.")
+                        else:
+                            raise WeatherAPIError(f"HTTP error occurred: {e}")
+                    # Parse the raw bytes directly; response.json() would go
+                    # through the slower stdlib decoder and an extra text decode.
+                    try:
+                        data = _parse_json(response.content)
+                    except ValueError as e:
+                        raise WeatherAPIError(f"An error occurred while fetching weather data: {e}")
+                    if self.cache_ttl:
+                        self._cache[cache_key] = (time.monotonic(), data)
+                        self._disk_cache_set(cache_key, data,
+                                             response.headers.get("ETag"),
+                                             response.headers.get("Last-Modified"))
+                        # The cached dict must stay private, same as on hits.
+                        return copy.deepcopy(data)
+                    return data
+                retry_after = response.headers.get("Retry-After")
+
+            if attempt == self.max_retries:
+                raise last_error
+            self._sleep_before_retry(attempt, retry_after)
+
+    # Everything that can go wrong reading user-writable cache state: sqlite
+    # trouble, filesystem errors (gzip.BadGzipFile included), damaged deflate
+    # streams, truncated gzip data, and malformed JSON bodies.
+    _DISK_CACHE_ERRORS = (sqlite3.Error, OSError, zlib.error, EOFError, ValueError)
+
+    def _disk_cache_get(self, cache_key: tuple) -> Optional[Dict[str, Any]]:
+        """Look up a payload in the on-disk cache; a broken cache is treated as a miss."""
+        if self._disk_cache is None:
+            return None
+        try:
+            return self._disk_cache.get(f"{cache_key[1]}|{cache_key[0]}", self.cache_ttl)
+        except self._DISK_CACHE_ERRORS:
+            return None
+
+    def _disk_cache_entry(self, cache_key: tuple) -> Optional[tuple]:
+        """Fetch a disk entry regardless of age, for conditional revalidation."""
+        if self._disk_cache is None:
+            return None
+        try:
+            return self._disk_cache.get_entry(f"{cache_key[1]}|{cache_key[0]}")
+        except self._DISK_CACHE_ERRORS:
+            return None
+
+    def _disk_cache_set(self, cache_key: tuple, data: Dict[str, Any],
+                        etag: Optional[str] = None,
+                        last_modified: Optional[str] = None) -> None:
+        """Store a payload in the on-disk cache; failures never break the query."""
+        if self._disk_cache is None:
+            return
+        try:
+            self._disk_cache.set(f"{cache_key[1]}|{cache_key[0]}", data, etag, last_modified)
+        except (sqlite3.Error, OSError):
+            pass
+
+    def _disk_cache_touch(self, cache_key: tuple) -> None:
+        """Refresh the disk timestamp after the server confirmed an entry via 304."""
+        if self._disk_cache is None:
+            return
+        try:
+            self._disk_cache.touch(f"{cache_key[1]}|{cache_key[0]}")
+        except (sqlite3.Error, OSError):
+            pass
+
+    def _sleep_before_retry(self, attempt: int, retry_after: Optional[str] = None) -> None:
+        """
+        Sleep before the next retry attempt.
 
-    def format_weather_output(self, data: Dict[str, Any], units: str = "metric") -> str:
+        Uses exponential backoff with jitter, and honors the server's
+        Retry-After header when it asks for a longer wait.
+        """
+        delay = random.uniform(self.backoff_base, self.backoff_base * 2) * (2 ** attempt)
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        time.sleep(delay)
+
+    def format_weather_output(self, data: Dict[str, Any], units: Optional[str] = None) -> str:
         """
         Format weather data into a human-readable string.
 
         Args:
             data: Weather data dictionary from the API.
             units: Unit system used ('metric', 'imperial', or 'standard').
+                Defaults to the unit system the instance was built with.
 
         Returns:
             Formatted weather information string.
         """
-        # Determine temperature unit symbol
-        temp_unit = "°C" if units == "metric" else "°F" if units == "imperial" else "K"
-        speed_unit = "m/s" if units == "metric" else "mph" if units == "imperial" else "m/s"
-
-        city_name = data.get("name", "Unknown")
-        country = data.get("sys", {}).get("country", "")
-
-        weather_main = data.get("weather", [{}])[0].get("main", "N/A")
-        weather_desc = data.get("weather", [{}])[0].get("description", "N/A")
+        if units is None:
+            # Symbols were precomputed at construction time.
+            temp_unit, speed_unit = self._temp_unit, self._speed_unit
+        else:
+            temp_unit, speed_unit = _UNITS.get(units, _UNITS["standard"])
+
+        # Bind each parent section once instead of re-walking the payload for
+        # every field; `or` also covers sections that are present but empty.
+        main_d = data.get("main") or {}
+        wind_d = data.get("wind") or {}
+        weather_d = (data.get("weather") or ({},))[0]
+
+        return _OUTPUT_TEMPLATE.format(
+            city_name=data.get("name", "Unknown"),
+            country=(data.get("sys") or {}).get("country", ""),
+            weather_main=weather_d.get("main", "N/A"),
+            weather_desc=weather_d.get("description", "N/A"),
+            temp=main_d.get("temp", "N/A"),
+            feels_like=main_d.get("feels_like", "N/A"),
+            temp_min=main_d.get("temp_min", "N/A"),
+            temp_max=main_d.get("temp_max", "N/A"),
+            temp_unit=temp_unit,
+            humidity=main_d.get("humidity", "N/A"),
+            pressure=main_d.get("pressure", "N/A"),
+            wind_speed=wind_d.get("speed", "N/A"),
+            wind_deg=wind_d.get("deg", "N/A"),
+            speed_unit=speed_unit,
+            clouds=(data.get("clouds") or {}).get("all", "N/A"),
+        )
+
+
+class AsyncWeatherCLI(WeatherCLI):
+    """Async variant of WeatherCLI that fans out multi-city queries over aiohttp."""
+
+    def __init__(self, api_key: Optional[str] = None, **kwargs):
+        """
+        Initialize the async Weather CLI.
 
-        temp = data.get("main", {}).get("temp", "N/A")
-        feels_like = data.get("main", {}).get("feels_like", "N/A")
-        temp_min = data.get("main", {}).get("temp_min", "N/A")
-        temp_max = data.get("main", {}).get("temp_max", "N/A")
-        humidity = data.get("main", {}).get("humidity", "N/A")
-        pressure = data.get("main", {}).get("pressure", "N/A")
+        Args:
+            api_key: OpenWeatherMap API key. If not provided, reads from OPENWEATHER_API_KEY env variable.
+            **kwargs: Remaining WeatherCLI options (cache_ttl, max_retries, ...).
 
-        wind_speed = data.get("wind", {}).get("speed", "N/A")
-        wind_deg = data.get("wind", {}).get("deg", "N/A")
+        Raises:
+            WeatherAPIError: If no API key is available or aiohttp is not installed.
+        """
+        if aiohttp is None:
+            raise WeatherAPIError(
+                "aiohttp is required for concurrent multi-city queries. Install it with 'pip install aiohttp'."
+            )
+        super().__init__(api_key=api_key, **kwargs)
 
-        clouds = data.get("clouds", {}).get("all", "N/A")
+    async def _fetch(self, session: "aiohttp.ClientSession", city: str, units: str) -> Dict[str, Any]:
+        """
+        Fetch and parse the weather payload for a single city.
 
-        output = f"""
-╔════════════════════════════════════════════════════════════╗
-║  Weather Information for {city_name}, {country}
-╚════════════════════════════════════════════════════════════╝
+        Raises:
+            WeatherAPIError: With the same messages as the sync path. aiohttp's
+                own exceptions embed the request URL — including the API key in
+                the query string — so they must never surface verbatim.
+        """
+        city = city.strip()
+        params = {
+            "q": city,
+            "appid": self.api_key,
+            "units": units
+        }
+        try:
+            async with session.get(self.BASE_URL, params=params) as response:
+                if response.status == 401:
+                    raise WeatherAPIError("Invalid API key. Please check your OPENWEATHER_API_KEY.")
+                if response.status == 404:
+                    raise WeatherAPIError(f"City '{city}' not found. Please check the city name.")
+                response.raise_for_status()
+                return await response.json()
+        except asyncio.TimeoutError:
+            raise WeatherAPIError("Request timed out. Please check your internet connection.")
+        except aiohttp.ClientResponseError as e:
+            raise WeatherAPIError(f"HTTP error occurred: {e.status} {e.message}")
+        except aiohttp.ClientError:
+            raise WeatherAPIError("Connection error. Please check your internet connection.")
 
-🌤️  Condition: {weather_main} ({weather_desc})
+    async def get_weather_many(self, cities: List[str], units: Optional[str] = None) -> list:
+        """
+        Fetch weather data for several cities concurrently.
 
-🌡️  Temperature:
-    Current:    {temp}{temp_unit}
-    Feels Like: {feels_like}{temp_unit}
-    Min/Max:    {temp_min}{temp_unit} / {temp_max}{temp_unit}
+        Args:
+            cities: City names to query.
+            units: Unit system ('metric', 'imperial', or 'standard').
+                Defaults to the unit system the instance was built with.
 
-💧 Humidity:    {humidity}%
-🔽 Pressure:    {pressure} hPa
+        Returns:
+            A list aligned with cities: each entry is either the weather data
+            dictionary or the exception raised for that city.
 
-💨 Wind:
-    Speed:      {wind_speed} {speed_unit}
-    Direction:  {wind_deg}°
+        Note:
+            Every city is fetched fresh from the API; the in-memory and
+            on-disk caches used by get_weather are not consulted.
+        """
+        if units is None:
+            units = self.units
+        connector = aiohttp.TCPConnector(limit=16, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            tasks = [asyncio.create_task(self._fetch(session, city, units)) for city in cities]
+            return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _daemon_socket_path() -> str:
+    """Return the default unix-socket path used by daemon and client mode."""
+    return os.path.join(os.path.expanduser(WeatherCLI.DEFAULT_CACHE_DIR), "sock")
+
+
+def _recv_until(conn: socket.socket, terminator: Optional[bytes] = b"\n") -> bytes:
+    """Read from a socket until the terminator, or until EOF when it is None."""
+    chunks = []
+    while True:
+        chunk = conn.recv(4096)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if terminator is not None and chunk.endswith(terminator):
+            break
+    return b"".join(chunks)
+
+
+def run_daemon(weather_cli: WeatherCLI, socket_path: Optional[str] = None) -> None:
+    """
+    Serve weather queries over a unix socket until interrupted.
+
+    A long-running daemon keeps the HTTP session, TLS connection and TTL
+    cache warm across CLI invocations, so a client query costs one local
+    round trip on a cache hit instead of a full process start plus handshake.
+
+    Args:
+        weather_cli: The WeatherCLI instance servicing queries.
+        socket_path: Unix-socket path to listen on. Defaults to the
+            cache-directory socket used by client mode.
+    """
+    if socket_path is None:
+        socket_path = _daemon_socket_path()
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    try:
+        os.unlink(socket_path)
+    except FileNotFoundError:
+        pass
 
-☁️  Cloudiness: {clouds}%
-"""
-        return output
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(socket_path)
+        server.listen()
+        while True:
+            conn, _ = server.accept()
+            # One misbehaving client (or a surprise error from get_weather)
+            # must never take the daemon down, so the whole exchange --
+            # including the reply send to a possibly-gone peer -- is guarded.
+            try:
+                with conn:
+                    # A client that connects and then goes quiet must not
+                    # wedge the single-threaded accept loop.
+                    conn.settimeout(10)
+                    try:
+                        request = json.loads(_recv_until(conn))
+                        data = weather_cli.get_weather(request.get("city", ""),
+                                                       request.get("units"))
+                        reply = {"ok": True,
+                                 "output": weather_cli.format_weather_output(
+                                     data, request.get("units"))}
+                    except WeatherAPIError as e:
+                        reply = {"ok": False, "output": f"❌ Error: {e}"}
+                    except Exception as e:
+                        reply = {"ok": False, "output": f"❌ Unexpected error: {e}"}
+                    conn.sendall(json.dumps(reply).encode("utf-8"))
+            except Exception as e:
+                print(f"⚠️  Daemon: dropped connection: {e}", file=sys.stderr)
+    finally:
+        server.close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+
+
+def query_daemon(city: str, units: Optional[str] = None,
+                 socket_path: Optional[str] = None) -> tuple:
+    """
+    Send one weather query to a running daemon.
+
+    Args:
+        city: Name of the city to query.
+        units: Unit system, or None for the daemon's default.
+        socket_path: Unix-socket path of the daemon. Defaults to the
+            cache-directory socket.
+
+    Returns:
+        A (ok, output) tuple: the formatted report on success, or an error
+        message with ok set to False.
+
+    Raises:
+        OSError: If the daemon cannot be reached (stale or missing socket).
+    """
+    if socket_path is None:
+        socket_path = _daemon_socket_path()
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.settimeout(30)
+        client.connect(socket_path)
+        client.sendall(json.dumps({"city": city, "units": units}).encode("utf-8") + b"\n")
+        raw_reply = _recv_until(client, terminator=None)
+    finally:
+        client.close()
+    try:
+        reply = json.loads(raw_reply)
+        return reply["ok"], reply["output"]
+    except (ValueError, KeyError, TypeError) as e:
+        # Surface a half-written or empty reply as OSError so callers treat
+        # it like any other unreachable-daemon condition.
+        raise ConnectionError(f"Malformed reply from daemon: {e}")
 
 
-def main():
-    """Main entry point for the CLI application."""
+@functools.lru_cache(maxsize=None)
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser (cached across invocations)."""
     parser = argparse.ArgumentParser(
         description="Fetch current weather information from OpenWeatherMap API.",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -144,6 +663,7 @@ Examples:
   %(prog)s London
   %(prog)s "New York" --units imperial
   %(prog)s Tokyo --api-key YOUR_API_KEY
+  %(prog)s London Paris Tokyo
 
 Environment Variables:
   OPENWEATHER_API_KEY    Your OpenWeatherMap API key
@@ -153,7 +673,8 @@ Environment Variables:
     parser.add_argument(
         "city",
         type=str,
-        help="Name of the city to get weather for"
+        nargs="*",
+        help="Name of the city (or cities) to get weather for"
     )
 
     parser.add_argument(
@@ -170,26 +691,118 @@ Environment Variables:
         help="OpenWeatherMap API key (can also be set via OPENWEATHER_API_KEY env variable)"
     )
 
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Run as a daemon serving queries over a unix socket, keeping "
+             "the HTTP session and cache warm across invocations"
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the response cache and always query the API"
+    )
+
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=None,
+        metavar="SECONDS",
+        help=f"Seconds to serve repeated queries from the cache. Default: {WeatherCLI.DEFAULT_CACHE_TTL}"
+    )
+
     parser.add_argument(
         "-v", "--version",
         action="version",
         version="%(prog)s 1.0.0"
     )
 
-    args = parser.parse_args()
+    return parser
+
+
+def main(argv=None):
+    """
+    Main entry point for the CLI application.
+
+    Args:
+        argv: Optional list of command-line arguments. Defaults to sys.argv.
+    """
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    if not args.daemon and not args.city:
+        parser.error("the following arguments are required: city")
+
+    if args.no_cache:
+        cache_ttl, cache_dir = 0, None
+    else:
+        cache_ttl = args.cache_ttl if args.cache_ttl is not None else WeatherCLI.DEFAULT_CACHE_TTL
+        cache_dir = WeatherCLI.DEFAULT_CACHE_DIR
 
     try:
+        if args.daemon:
+            with WeatherCLI(api_key=args.api_key, units=args.units,
+                            cache_ttl=cache_ttl, cache_dir=cache_dir) as daemon_cli:
+                run_daemon(daemon_cli)
+            return 0
+
+        # A running daemon already holds a warm session and cache; hand the
+        # queries to it and fall back to a direct fetch if it is gone. Flags
+        # that change caching or credentials can't be applied to the daemon's
+        # instance, so they force an in-process fetch.
+        if (not args.no_cache and args.cache_ttl is None and args.api_key is None
+                and os.path.exists(_daemon_socket_path())):
+            try:
+                exit_code = 0
+                for city in args.city:
+                    ok, output = query_daemon(city, args.units)
+                    if ok:
+                        print(output)
+                    else:
+                        print(output, file=sys.stderr)
+                        exit_code = 1
+                return exit_code
+            except OSError:
+                pass  # stale socket; serve the request in-process instead
+
         # Initialize the Weather CLI
-        weather_cli = WeatherCLI(api_key=args.api_key)
+        weather_cli = WeatherCLI(api_key=args.api_key, units=args.units,
+                                 cache_ttl=cache_ttl, cache_dir=cache_dir)
 
-        # Fetch weather data
-        weather_data = weather_cli.get_weather(args.city, args.units)
+        try:
+            if len(args.city) == 1:
+                # Fetch weather data
+                weather_data = weather_cli.get_weather(args.city[0])
+
+                # Format and display the output
+                output = weather_cli.format_weather_output(weather_data)
+                print(output)
 
-        # Format and display the output
-        output = weather_cli.format_weather_output(weather_data, args.units)
-        print(output)
+                return 0
 
-        return 0
+            # Several cities: fan out concurrently when aiohttp is available,
+            # otherwise fetch sequentially over the shared keep-alive session.
+            if aiohttp is not None:
+                with AsyncWeatherCLI(api_key=args.api_key, units=args.units) as async_cli:
+                    results = asyncio.run(async_cli.get_weather_many(args.city))
+            else:
+                results = []
+                for city in args.city:
+                    try:
+                        results.append(weather_cli.get_weather(city))
+                    except WeatherAPIError as e:
+                        results.append(e)
+
+            exit_code = 0
+            for city, result in zip(args.city, results):
+                if isinstance(result, Exception):
+                    print(f"❌ Error for {city}: {result}", file=sys.stderr)
+                    exit_code = 1
+                else:
+                    print(weather_cli.format_weather_output(result))
+            return exit_code
+        finally:
+            weather_cli.close()
 
     except WeatherAPIError as e:
         print(f"❌ Error: {e}", file=sys.stderr)